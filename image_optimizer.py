@@ -6,115 +6,436 @@ Converts images to WEBP and/or AVIF formats with resizing and quality options.
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
+import io
 import os
 import sys
 from pathlib import Path
-from PIL import Image, ImageOps
+from PIL import Image, ImageOps, ExifTags
 import threading
 import queue
 import time
 import multiprocessing
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
 import functools
+import itertools
+from collections import namedtuple
 
-def process_single_image(args):
-    """Process a single image - designed to work with multiprocessing"""
+try:
+    # Optional libvips backend for streaming decode/resize/encode
+    import pyvips
+except ImportError:
+    pyvips = None
+
+# Supported input image formats
+SUPPORTED_FORMATS = frozenset({'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif', '.gif', '.webp'})
+
+# Output folders created inside the source folder, never scanned for input
+OUTPUT_FOLDER_NAMES = frozenset({'webp', 'avif'})
+
+# File in each output folder recording the settings its images were encoded with
+SETTINGS_STAMP_NAME = '.image_optimizer_settings'
+
+# Encoder presets as (WEBP method, AVIF speed); AVIF speeds of 2 or
+# below are left out as they are many times slower for little gain
+ENCODER_PRESETS = {
+    'Fast': (4, 8),
+    'Balanced': (5, 7),
+    'Quality': (6, 6),
+}
+
+# AV1 encoders libavif can be built with; SVT-AV1 and rav1e are usually
+# much faster than the default libaom at similar file sizes
+AVIF_CODECS = ('aom', 'svt', 'rav1e')
+
+# Per-batch options sent with every image task; a namedtuple pickles
+# as bare values instead of repeating each key name
+ImageJob = namedtuple('ImageJob', ['outputs', 'max_width', 'max_height', 'force_reencode',
+                                   'use_vips', 'parallel_encode', 'stale_formats'])
+
+# Transpose operations that undo each EXIF orientation value
+EXIF_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+# Downscales of more than this factor box-reduce before LANCZOS; at 3.0
+# the result is indistinguishable from a full LANCZOS resample
+RESIZE_REDUCING_GAP = 3.0
+
+# JPEG draft decodes stay at least this many times the target size, so
+# LANCZOS still does the final resample instead of the DCT scaler
+JPEG_DRAFT_MARGIN = 2
+
+# Box size handed to libvips thumbnail() for an unlimited dimension
+VIPS_NO_LIMIT = 10_000_000
+
+# Output folders already created by this process, so each image
+# doesn't pay a mkdir call per format
+_created_directories = set()
+
+# The log drops its oldest lines past this length so long runs stay responsive
+LOG_MAX_LINES = 2000
+LOG_TRIM_LINES = 500
+
+def available_cpu_count():
+    """Number of CPUs this process is allowed to run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        # sched_getaffinity is not available on Windows or macOS
+        return os.cpu_count() or 1
+
+def available_avif_codecs():
+    """AV1 encoders the installed AVIF plugin can use"""
+    try:
+        from pillow_avif import _avif
+    except ImportError:
+        return ()
+    return tuple(codec for codec in AVIF_CODECS if _avif.encoder_codec_available(codec))
+
+def init_worker():
+    """Load optional codec plugins once per process"""
     try:
-        file_path, source_path, settings = args
+        # Registers the AVIF encoder with Pillow
+        import pillow_avif  # noqa: F401
+    except ImportError:
+        return
+    
+    # Encode a tiny image so the first real AVIF doesn't pay codec setup
+    try:
+        Image.new('RGB', (16, 16)).save(io.BytesIO(), 'AVIF', speed=10)
+    except (KeyError, OSError, ValueError):
+        pass
+
+def iter_image_files(folder, supported_formats=SUPPORTED_FORMATS):
+    """Recursively yield image file paths as strings, skipping the webp/avif output folders"""
+    # An explicit stack avoids a chain of nested generators on deep trees
+    entries = os.scandir(folder)
+    pending = []
+    while True:
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in OUTPUT_FOLDER_NAMES:
+                        pending.append(entry.path)
+                elif entry.is_file():
+                    if os.path.splitext(entry.name)[1].lower() in supported_formats:
+                        yield entry.path
         
-        # Unpack settings
-        webp_folder = settings['webp_folder']
-        avif_folder = settings['avif_folder']
-        convert_webp = settings['convert_webp']
-        convert_avif = settings['convert_avif']
-        webp_quality = settings['webp_quality']
-        avif_quality = settings['avif_quality']
-        max_width = settings['max_width']
-        max_height = settings['max_height']
-        
-        relative_path = file_path.relative_to(source_path)
-        results = {'file': relative_path, 'success': True, 'messages': []}
-        
-        # Open and process image with optimization
-        with Image.open(file_path) as img:
-            # Optimize loading for large images
-            img.load()
-            
-            # Convert to RGB if necessary (optimized)
-            if img.mode in ('RGBA', 'LA'):
-                # Create white background only once
+        while pending:
+            try:
+                entries = os.scandir(pending.pop())
+                break
+            except OSError:
+                # Skip unreadable subfolders instead of aborting the whole walk
+                continue
+        else:
+            return
+
+def ensure_directory(path):
+    """Create an output folder unless this process already has"""
+    if path not in _created_directories:
+        path.mkdir(parents=True, exist_ok=True)
+        _created_directories.add(path)
+
+def write_file(path, data):
+    """Write a bytes-like object straight to a new file with raw os.write calls"""
+    # Skips the buffered file object; os.write may write less than asked, so loop
+    view = memoryview(data)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+    try:
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+def write_atomically(path, data):
+    """Write encoded bytes to a temporary file, then move it into place"""
+    # A crash mid-write never leaves a truncated output behind
+    temp_path = path.with_name(path.name + '.tmp')
+    try:
+        try:
+            write_file(temp_path, data)
+        except FileNotFoundError:
+            # The folder was deleted after this process created it, e.g. between runs
+            _created_directories.discard(path.parent)
+            ensure_directory(path.parent)
+            write_file(temp_path, data)
+        os.replace(temp_path, path)
+    except OSError:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+def save_atomically(img, path, image_format, **params):
+    """Encode into memory, then move the finished file into place"""
+    buffer = io.BytesIO()
+    img.save(buffer, image_format, **params)
+    write_atomically(path, buffer.getbuffer())
+
+def build_output_plan(settings, webp_folder, avif_folder, avif_threads=None):
+    """Resolve the enabled output formats and their save options once per batch"""
+    outputs = []
+    if settings['convert_webp']:
+        outputs.append(('WEBP', os.fspath(webp_folder), '.webp', {
+            'quality': settings['webp_quality'],
+            'optimize': True,
+            'method': settings['webp_method'],
+        }))
+    if settings['convert_avif']:
+        avif_params = {
+            'quality': settings['avif_quality'],
+            'speed': settings['avif_speed'],
+        }
+        if settings['avif_codec'] != 'auto':
+            avif_params['codec'] = settings['avif_codec']
+        if avif_threads:
+            avif_params['max_threads'] = avif_threads
+        outputs.append(('AVIF', os.fspath(avif_folder), '.avif', avif_params))
+    return tuple(outputs)
+
+def save_output(img, relative_path, output_path, output):
+    """Save one output format, returning (success, format or error message)"""
+    image_format, _, _, params = output
+    ensure_directory(output_path.parent)
+    try:
+        save_atomically(img, output_path, image_format, **params)
+        return True, image_format
+    except Exception as e:
+        return False, f"Failed to save {image_format} for {relative_path}: {str(e)}"
+
+def is_up_to_date(output_path, source_mtime):
+    """Check whether an output exists and is at least as new as its source"""
+    try:
+        return os.stat(output_path).st_mtime >= source_mtime
+    except FileNotFoundError:
+        return False
+
+def settings_stamp(output, settings):
+    """Describe every setting that changes the files written for one output"""
+    image_format, _, _, params = output
+    # Thread count only affects speed, not the encoded result
+    options = sorted((key, value) for key, value in params.items() if key != 'max_threads')
+    return repr((image_format, options, settings['max_width'], settings['max_height'], settings['use_vips']))
+
+def find_stale_formats(outputs, settings):
+    """Return the formats whose output folder was last built with different settings"""
+    stale = set()
+    for output in outputs:
+        try:
+            previous = Path(output[1], SETTINGS_STAMP_NAME).read_text(encoding='utf-8')
+        except OSError:
+            previous = None
+        if previous != settings_stamp(output, settings):
+            stale.add(output[0])
+    return frozenset(stale)
+
+def write_settings_stamps(outputs, settings):
+    """Record the settings each output folder is now up to date with"""
+    for output in outputs:
+        write_atomically(Path(output[1], SETTINGS_STAMP_NAME), settings_stamp(output, settings).encode('utf-8'))
+
+def encode_with_pillow(file_path, relative_path, targets, max_width, max_height, parallel_encode):
+    """Decode, flatten, resize and encode one image with Pillow"""
+    # Open and process image with optimization; img is rebound as it is
+    # converted, so keep a handle on the opened file to close it
+    source = img = Image.open(file_path)
+    try:
+        # Orientations 5-8 swap width and height once applied
+        exif = img.getexif()
+        orientation = exif.get(ExifTags.Base.Orientation, 1)
+        if orientation in (5, 6, 7, 8):
+            limits = (max_height, max_width)
+        else:
+            limits = (max_width, max_height)
+        
+        # Work out the final size from the original dimensions
+        target_size = calculate_target_size(img.size, *limits)
+        
+        # Let libjpeg decode at 1/2, 1/4 or 1/8 scale when downsizing
+        if target_size and img.format == 'JPEG':
+            img.draft('RGB', (target_size[0] * JPEG_DRAFT_MARGIN, target_size[1] * JPEG_DRAFT_MARGIN))
+        
+        # Optimize loading for large images
+        img.load()
+        
+        # Palette images with a transparent index need the alpha path
+        if img.mode == 'P' and 'transparency' in img.info:
+            img = img.convert('RGBA')
+        
+        # Convert to RGB if necessary (optimized)
+        if img.mode in ('RGBA', 'LA'):
+            alpha = img.getchannel('A')
+            if alpha.getextrema()[0] == 255:
+                # Fully opaque, so just drop the alpha band
+                img = img.convert('RGB')
+            else:
                 background = Image.new('RGB', img.size, (255, 255, 255))
-                background.paste(img, mask=img.split()[-1])
+                background.paste(img, mask=alpha)
                 img = background
-            elif img.mode == 'P':
-                # Handle palette mode
-                img = img.convert('RGB')
-            elif img.mode != 'RGB':
-                img = img.convert('RGB')
-            
-            # Resize if needed
-            img = resize_image_standalone(img, max_width, max_height)
-            
-            # Save formats
-            if convert_webp:
-                webp_path = webp_folder / relative_path.with_suffix('.webp')
-                webp_path.parent.mkdir(parents=True, exist_ok=True)
-                # Use optimized save parameters
-                img.save(webp_path, 'WEBP', quality=webp_quality, optimize=True, method=6)
-                results['messages'].append(f"Saved WEBP: {webp_path.relative_to(source_path)}")
-            
-            if convert_avif:
-                avif_path = avif_folder / relative_path.with_suffix('.avif')
-                avif_path.parent.mkdir(parents=True, exist_ok=True)
-                try:
-                    # Use optimized AVIF parameters
-                    img.save(avif_path, 'AVIF', quality=avif_quality, optimize=True, speed=6)
-                    results['messages'].append(f"Saved AVIF: {avif_path.relative_to(source_path)}")
-                except Exception as e:
-                    results['messages'].append(f"Failed to save AVIF for {relative_path}: {str(e)}")
+            # The full-size alpha band would otherwise stay alive through the encodes
+            del alpha
+        elif img.mode != 'RGB':
+            img = img.convert('RGB')
         
-        return results
+        # Resize if needed
+        img = resize_image_standalone(img, target_size)
         
-    except Exception as e:
-        return {'file': relative_path, 'success': False, 'messages': [f"Error processing {relative_path}: {str(e)}"]}
+        # Apply the EXIF orientation to the resized pixels
+        if orientation in EXIF_TRANSPOSE:
+            img = img.transpose(EXIF_TRANSPOSE[orientation])
+            # Keep the rest of the metadata but clear the orientation so
+            # viewers don't rotate the pixels again
+            del exif[ExifTags.Base.Orientation]
+            img.info['exif'] = exif.tobytes()
+        
+        # Free the full-size decode before the slow encodes run; with several
+        # workers this keeps only the output-sized pixels resident per process
+        if img is not source:
+            source.close()
+        
+        # Save formats
+        if parallel_encode and len(targets) > 1:
+            # Both encoders release the GIL, so run them side by side.
+            # save() stores encoder options on the image, so each thread
+            # gets its own copy.
+            with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+                futures = [executor.submit(save_output, img if i == 0 else img.copy(), relative_path, output_path, output)
+                           for i, (output_path, output) in enumerate(targets)]
+                outcomes = [future.result() for future in futures]
+        else:
+            outcomes = [save_output(img, relative_path, output_path, output) for output_path, output in targets]
+        
+        return outcomes
+    finally:
+        source.close()
 
-def resize_image_standalone(img, max_width, max_height):
-    """Standalone resize function for multiprocessing"""
-    original_width, original_height = img.size
-    max_w = max_width if max_width > 0 else None
-    max_h = max_height if max_height > 0 else None
+def encode_with_vips(file_path, relative_path, targets, max_width, max_height):
+    """Decode, flatten, resize and encode one image with libvips"""
+    # thumbnail() shrinks on load, applies the EXIF orientation and only
+    # ever downsizes; an oversized box stands in for "no limit"
+    img = pyvips.Image.thumbnail(
+        str(file_path),
+        max_width or VIPS_NO_LIMIT,
+        height=max_height or VIPS_NO_LIMIT,
+        size='down',
+    )
     
-    # If no limits set, return original
-    if not max_w and not max_h:
-        return img
+    if img.hasalpha():
+        img = img.flatten(background=255)
+    if img.interpretation != 'srgb':
+        img = img.colourspace('srgb')
     
-    # Don't enlarge images
-    if max_w and original_width <= max_w and max_h and original_height <= max_h:
-        return img
-    if max_w and not max_h and original_width <= max_w:
-        return img
-    if max_h and not max_w and original_height <= max_h:
-        return img
+    # The pipeline is lazy; render it once when it feeds several encoders
+    if len(targets) > 1:
+        img = img.copy_memory()
     
-    # Calculate new dimensions
-    if max_w and max_h:
-        # Both dimensions specified - maintain aspect ratio
-        ratio = min(max_w / original_width, max_h / original_height)
-    elif max_w:
-        # Only width specified
-        ratio = max_w / original_width
-    else:
-        # Only height specified
-        ratio = max_h / original_height
+    outcomes = []
+    for output_path, (image_format, _, _, params) in targets:
+        ensure_directory(output_path.parent)
+        try:
+            if image_format == 'WEBP':
+                data = img.webpsave_buffer(Q=params['quality'], effort=params['method'])
+            else:
+                # libvips effort runs the other way from AVIF speed
+                options = {'encoder': params['codec']} if 'codec' in params else {}
+                data = img.heifsave_buffer(Q=params['quality'], compression='av1',
+                                           effort=9 - min(params['speed'], 9), **options)
+            write_atomically(output_path, data)
+            outcomes.append((True, image_format))
+        except Exception as e:
+            outcomes.append((False, f"Failed to save {image_format} for {relative_path}: {str(e)}"))
+    return outcomes
+
+def build_image_job(settings, parallel_encode):
+    """Collect the options process_single_image needs from the batch settings"""
+    return ImageJob(outputs=settings['outputs'], max_width=settings['max_width'],
+                    max_height=settings['max_height'], force_reencode=settings['force_reencode'],
+                    use_vips=settings['use_vips'], parallel_encode=parallel_encode,
+                    stale_formats=settings['stale_formats'])
+
+def process_single_image(args):
+    """Process a single image - designed to work with multiprocessing"""
+    # Paths arrive as plain strings, which pickle far smaller than Path objects
+    file_path, source_path, job = args
+    file_path = Path(file_path)
+    relative_path = file_path.relative_to(source_path)
     
-    # Don't enlarge
-    if ratio >= 1:
-        return img
+    try:
+        # Unpack settings
+        outputs = job.outputs
+        max_width = job.max_width
+        max_height = job.max_height
+        parallel_encode = job.parallel_encode
         
-    new_width = int(original_width * ratio)
-    new_height = int(original_height * ratio)
+        results = {'file': str(relative_path), 'success': True, 'messages': []}
+        
+        # Resolve each output path once for the checks and the saves
+        targets = [(Path(output[1], relative_path.with_suffix(output[2])), output) for output in outputs]
+        
+        # Only encode outputs that are missing, older than the source, or
+        # were encoded with settings that have since changed
+        if not job.force_reencode:
+            source_mtime = os.stat(file_path).st_mtime
+            targets = [(output_path, output) for output_path, output in targets
+                       if output[0] in job.stale_formats or not is_up_to_date(output_path, source_mtime)]
+            if not targets:
+                results['messages'].append(f"Up to date: {relative_path}")
+                return results
+        
+        outcomes = None
+        if job.use_vips:
+            try:
+                outcomes = encode_with_vips(file_path, relative_path, targets, max_width, max_height)
+            except pyvips.Error:
+                # Some libvips builds have no loader for formats like BMP;
+                # Pillow reads every supported format, so fall back to it
+                outcomes = None
+        if outcomes is None:
+            outcomes = encode_with_pillow(file_path, relative_path, targets, max_width, max_height, parallel_encode)
+        
+        # One summary line per image keeps the log short
+        saved_formats = []
+        for success, message in outcomes:
+            if success:
+                saved_formats.append(message)
+            else:
+                results['success'] = False
+                results['messages'].append(message)
+        if saved_formats:
+            results['messages'].append(f"Saved {', '.join(saved_formats)}: {relative_path}")
+        
+        return results
+        
+    except Exception as e:
+        return {'file': str(relative_path), 'success': False, 'messages': [f"Error processing {relative_path}: {str(e)}"]}
+
+def calculate_target_size(size, max_width, max_height):
+    """Return the size that fits within the limits, or None to keep the original"""
+    original_width, original_height = size
+    
+    # An unset limit (0) never constrains, and images are never enlarged
+    ratio = min(max_width / original_width if max_width > 0 else 1.0,
+                max_height / original_height if max_height > 0 else 1.0,
+                1.0)
+    if ratio == 1.0:
+        return None
+    
+    # Very thin images could otherwise round a side down to zero
+    return (max(1, int(original_width * ratio)), max(1, int(original_height * ratio)))
+
+def resize_image_standalone(img, target_size):
+    """Standalone resize function for multiprocessing"""
+    if target_size is None or img.size == target_size:
+        return img
     
-    return img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+    # Large downscales box-reduce first, then LANCZOS over the smaller buffer
+    return img.resize(target_size, Image.Resampling.LANCZOS, reducing_gap=RESIZE_REDUCING_GAP)
 
 class ImageOptimizer:
     def __init__(self):
@@ -127,23 +448,31 @@ class ImageOptimizer:
         self.source_folder = tk.StringVar()
         self.convert_webp = tk.BooleanVar(value=True)
         self.convert_avif = tk.BooleanVar(value=True)
+        self.force_reencode = tk.BooleanVar(value=False)
         self.max_width = tk.IntVar(value=0)  # 0 means no limit
         self.max_height = tk.IntVar(value=0)  # 0 means no limit
         self.webp_quality = tk.IntVar(value=80)
         self.avif_quality = tk.IntVar(value=80)
+        self.webp_method = tk.IntVar(value=4)  # 0 = fastest, 6 = smallest
+        self.avif_speed = tk.IntVar(value=8)  # 0 = smallest, 10 = fastest
+        self.encoder_preset = tk.StringVar(value='Fast')
+        self.avif_codec = tk.StringVar(value='auto')  # auto = libavif's default encoder
         
         # Performance settings
         self.use_multiprocessing = tk.BooleanVar(value=True)
-        self.max_workers = tk.IntVar(value=min(8, multiprocessing.cpu_count()))
+        self.max_workers = tk.IntVar(value=available_cpu_count())
+        self.use_vips = tk.BooleanVar(value=pyvips is not None)
         
         # Progress tracking
         self.progress_queue = queue.Queue()
         self.is_processing = False
         self.stop_processing = False
+        # Worker processes are kept alive between runs to skip pool start-up
         self.executor = None
+        self.executor_workers = 0
         
         self.setup_ui()
-        self.check_progress()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
     def setup_ui(self):
         """Setup the user interface"""
@@ -172,6 +501,7 @@ class ImageOptimizer:
         
         ttk.Checkbutton(format_frame, text="Convert to WEBP", variable=self.convert_webp).grid(row=0, column=0, sticky=tk.W)
         ttk.Checkbutton(format_frame, text="Convert to AVIF", variable=self.convert_avif).grid(row=0, column=1, sticky=tk.W)
+        ttk.Checkbutton(format_frame, text="Force re-encode (ignore up-to-date outputs)", variable=self.force_reencode).grid(row=1, column=0, columnspan=2, sticky=tk.W)
         
         # Resize settings
         resize_frame = ttk.LabelFrame(main_frame, text="Resize Settings (0 = no limit)", padding="10")
@@ -192,12 +522,27 @@ class ImageOptimizer:
         ttk.Scale(quality_frame, from_=1, to=100, orient=tk.HORIZONTAL, variable=self.webp_quality, length=120).grid(row=0, column=1, padx=5)
         webp_quality_entry = ttk.Entry(quality_frame, textvariable=self.webp_quality, width=5)
         webp_quality_entry.grid(row=0, column=2, padx=5)
+        ttk.Label(quality_frame, text="Method:").grid(row=0, column=3, sticky=tk.W, padx=(20, 0))
+        ttk.Spinbox(quality_frame, from_=0, to=6, width=5, textvariable=self.webp_method).grid(row=0, column=4, padx=5)
         
         # AVIF Quality  
         ttk.Label(quality_frame, text="AVIF Quality:").grid(row=1, column=0, sticky=tk.W)
         ttk.Scale(quality_frame, from_=1, to=100, orient=tk.HORIZONTAL, variable=self.avif_quality, length=120).grid(row=1, column=1, padx=5)
         avif_quality_entry = ttk.Entry(quality_frame, textvariable=self.avif_quality, width=5)
         avif_quality_entry.grid(row=1, column=2, padx=5)
+        ttk.Label(quality_frame, text="Speed:").grid(row=1, column=3, sticky=tk.W, padx=(20, 0))
+        ttk.Spinbox(quality_frame, from_=0, to=10, width=5, textvariable=self.avif_speed).grid(row=1, column=4, padx=5)
+        
+        # Encoder presets fill in the method and speed values above
+        ttk.Label(quality_frame, text="Encoder Preset:").grid(row=2, column=0, sticky=tk.W, pady=(5, 0))
+        preset_combo = ttk.Combobox(quality_frame, textvariable=self.encoder_preset, values=list(ENCODER_PRESETS),
+                                    state="readonly", width=10)
+        preset_combo.grid(row=2, column=1, sticky=tk.W, padx=5, pady=(5, 0))
+        preset_combo.bind("<<ComboboxSelected>>", self.apply_encoder_preset)
+        
+        ttk.Label(quality_frame, text="AVIF Encoder:").grid(row=2, column=3, sticky=tk.W, padx=(20, 0), pady=(5, 0))
+        ttk.Combobox(quality_frame, textvariable=self.avif_codec, values=['auto', *available_avif_codecs()],
+                     state="readonly", width=7).grid(row=2, column=4, padx=5, pady=(5, 0))
         
         # Quality validation will be done at processing time instead of on every keystroke
         
@@ -208,8 +553,12 @@ class ImageOptimizer:
         ttk.Checkbutton(perf_frame, text="Use Multiprocessing (Faster)", variable=self.use_multiprocessing).grid(row=0, column=0, sticky=tk.W)
         
         ttk.Label(perf_frame, text="Max Workers:").grid(row=0, column=1, sticky=tk.W, padx=(20, 5))
-        ttk.Spinbox(perf_frame, from_=1, to=16, width=5, textvariable=self.max_workers).grid(row=0, column=2)
-        ttk.Label(perf_frame, text=f"(CPU cores: {multiprocessing.cpu_count()})").grid(row=0, column=3, sticky=tk.W, padx=(5, 0))
+        ttk.Spinbox(perf_frame, from_=1, to=max(16, available_cpu_count()), width=5, textvariable=self.max_workers).grid(row=0, column=2)
+        ttk.Label(perf_frame, text=f"(CPU cores: {available_cpu_count()})").grid(row=0, column=3, sticky=tk.W, padx=(5, 0))
+        
+        vips_text = "Use libvips backend (lower memory)" if pyvips else "Use libvips backend (pyvips not installed)"
+        ttk.Checkbutton(perf_frame, text=vips_text, variable=self.use_vips,
+                        state="normal" if pyvips else "disabled").grid(row=1, column=0, columnspan=4, sticky=tk.W)
         
         # Progress bar
         self.progress = ttk.Progressbar(main_frame, mode='determinate')
@@ -235,27 +584,88 @@ class ImageOptimizer:
         self.log_text = scrolledtext.ScrolledText(log_frame, width=70, height=15)
         self.log_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
+        # Latest throughput summary, so it stays visible however long the log gets
+        self.status_text = tk.StringVar()
+        ttk.Label(log_frame, textvariable=self.status_text).grid(row=1, column=0, sticky=tk.W, pady=(5, 0))
+        
     def browse_folder(self):
         """Open folder selection dialog"""
         folder = filedialog.askdirectory()
         if folder:
             self.source_folder.set(folder)
     
+    def apply_encoder_preset(self, event=None):
+        """Set WEBP method and AVIF speed from the selected preset"""
+        webp_method, avif_speed = ENCODER_PRESETS[self.encoder_preset.get()]
+        self.webp_method.set(webp_method)
+        self.avif_speed.set(avif_speed)
+    
     def stop_processing_request(self):
         """Request to stop the current processing"""
         self.stop_processing = True
         self.log_message("Stop requested - finishing current images...")
         self.stop_button.config(state="disabled")
         
-        # If using multiprocessing, shutdown the executor
-        if self.executor:
-            self.executor.shutdown(wait=False)
+    def check_settings_stamps(self, settings):
+        """Find outputs whose settings changed since the last completed run"""
+        stale_formats = find_stale_formats(settings['outputs'], settings)
+        # Folders without a record are new, or predate settings tracking
+        changed = sorted(output[0] for output in settings['outputs']
+                         if output[0] in stale_formats and Path(output[1], SETTINGS_STAMP_NAME).exists())
+        if changed and not settings['force_reencode']:
+            self.progress_queue.put(("log", f"Settings changed since the last run; re-encoding all {', '.join(changed)} files"))
+        
+        # Drop stale records before encoding, so a stopped run can't leave
+        # new outputs under an old record that later matches again
+        for output in settings['outputs']:
+            if output[0] in stale_formats:
+                Path(output[1], SETTINGS_STAMP_NAME).unlink(missing_ok=True)
+        return stale_formats
+    
+    def get_executor(self, max_workers):
+        """Return the worker pool, creating it on first use or when the worker count changes"""
+        if self.executor is not None and self.executor_workers != max_workers:
+            self.shutdown_executor()
+        
+        if self.executor is None:
+            # Fork copies a parent that already runs Tk and libvips threads, which
+            # can deadlock; spawn is also what macOS and Windows use by default
+            self.executor = ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker,
+                                                mp_context=multiprocessing.get_context('spawn'))
+            self.executor_workers = max_workers
+        return self.executor
+    
+    def shutdown_executor(self, cancel_futures=False):
+        """Shut down the worker pool without waiting for it"""
+        if self.executor is not None:
+            if cancel_futures and sys.version_info >= (3, 9):
+                # Also drop queued images so exiting doesn't wait for them
+                self.executor.shutdown(wait=False, cancel_futures=True)
+            else:
+                self.executor.shutdown(wait=False)
+            self.executor = None
+            self.executor_workers = 0
+    
+    def on_close(self):
+        """Stop any running batch and release the worker pool before exiting"""
+        self.stop_processing = True
+        self.shutdown_executor(cancel_futures=True)
+        self.root.destroy()
             
     def log_message(self, message):
         """Add message to log area"""
-        self.log_text.insert(tk.END, f"{time.strftime('%H:%M:%S')} - {message}\n")
+        self.log_messages([message])
+        
+    def log_messages(self, messages):
+        """Add several messages to the log area with a single insert"""
+        timestamp = time.strftime('%H:%M:%S')
+        self.log_text.insert(tk.END, "".join(f"{timestamp} - {message}\n" for message in messages))
+        
+        # Drop the oldest lines once the log grows past its limit
+        line_count = int(self.log_text.index('end-1c').split('.')[0])
+        if line_count > LOG_MAX_LINES:
+            self.log_text.delete('1.0', f'{line_count - LOG_MAX_LINES + LOG_TRIM_LINES}.0')
         self.log_text.see(tk.END)
-        self.root.update_idletasks()
         
     def validate_quality_values(self):
         """Validate quality values before processing"""
@@ -275,6 +685,20 @@ class ImageOptimizer:
         except tk.TclError:
             errors.append("AVIF quality must be a valid number between 1-100")
             
+        try:
+            webp_method = self.webp_method.get()
+            if webp_method < 0 or webp_method > 6:
+                errors.append(f"WEBP method must be between 0-6 (current: {webp_method})")
+        except tk.TclError:
+            errors.append("WEBP method must be a valid number between 0-6")
+            
+        try:
+            avif_speed = self.avif_speed.get()
+            if avif_speed < 0 or avif_speed > 10:
+                errors.append(f"AVIF speed must be between 0-10 (current: {avif_speed})")
+        except tk.TclError:
+            errors.append("AVIF speed must be a valid number between 0-10")
+            
         return errors
     
     def start_processing(self):
@@ -297,6 +721,12 @@ class ImageOptimizer:
             messagebox.showerror("Quality Error", error_msg)
             return
             
+        try:
+            settings = self.collect_settings()
+        except tk.TclError:
+            messagebox.showerror("Error", "Resize and worker settings must be valid numbers")
+            return
+            
         self.is_processing = True
         self.stop_processing = False
         self.process_button.config(text="Processing...", state="disabled")
@@ -305,50 +735,60 @@ class ImageOptimizer:
         # Reset progress bar to determinate mode
         self.progress.config(mode='determinate', value=0)
         self.log_text.delete(1.0, tk.END)
+        self.status_text.set("")
         
         # Start processing thread
         if self.use_multiprocessing.get():
-            thread = threading.Thread(target=self.process_images_multiprocessed)
+            thread = threading.Thread(target=self.process_images_multiprocessed, args=(settings,))
         else:
-            thread = threading.Thread(target=self.process_images_single)
+            thread = threading.Thread(target=self.process_images_single, args=(settings,))
         thread.daemon = True
         thread.start()
         
-    def process_images_multiprocessed(self):
+        # Poll for progress only while the batch is running
+        self.check_progress()
+        
+    def collect_settings(self):
+        """Read all UI settings once so worker threads never touch Tk variables"""
+        return {
+            'source_folder': self.source_folder.get(),
+            'convert_webp': self.convert_webp.get(),
+            'convert_avif': self.convert_avif.get(),
+            'force_reencode': self.force_reencode.get(),
+            'webp_quality': self.webp_quality.get(),
+            'webp_method': self.webp_method.get(),
+            'avif_quality': self.avif_quality.get(),
+            'avif_speed': self.avif_speed.get(),
+            'avif_codec': self.avif_codec.get(),
+            'max_width': self.max_width.get(),
+            'max_height': self.max_height.get(),
+            'max_workers': self.max_workers.get(),
+            'use_vips': self.use_vips.get() and pyvips is not None,
+        }
+        
+    def process_images_multiprocessed(self, settings):
         """Process all images using multiprocessing for better performance"""
         try:
-            source_path = Path(self.source_folder.get())
+            source_path = Path(settings['source_folder'])
             
             if not source_path.exists():
                 self.progress_queue.put(("error", "Source folder does not exist"))
                 return
                 
-            # Supported image formats
-            supported_formats = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif', '.gif', '.webp'}
-            
             # Create output folders
             webp_folder = source_path / "webp"
             avif_folder = source_path / "avif"
             
-            convert_webp = self.convert_webp.get()
-            convert_avif = self.convert_avif.get()
-            
-            if convert_webp:
+            if settings['convert_webp']:
                 webp_folder.mkdir(exist_ok=True)
                 self.progress_queue.put(("log", f"Created WEBP output folder"))
                 
-            if convert_avif:
+            if settings['convert_avif']:
                 avif_folder.mkdir(exist_ok=True)
                 self.progress_queue.put(("log", f"Created AVIF output folder"))
             
             # Find all image files
-            image_files = []
-            for file_path in source_path.rglob("*"):
-                if (file_path.is_file() and 
-                    file_path.suffix.lower() in supported_formats and
-                    "webp" not in file_path.parts and 
-                    "avif" not in file_path.parts):
-                    image_files.append(file_path)
+            image_files = list(iter_image_files(source_path))
             
             total_files = len(image_files)
             self.progress_queue.put(("log", f"Found {total_files} image files to process"))
@@ -358,113 +798,128 @@ class ImageOptimizer:
                 self.progress_queue.put(("error", "No supported image files found"))
                 return
             
-            # Prepare settings for multiprocessing
-            settings = {
-                'webp_folder': webp_folder,
-                'avif_folder': avif_folder,
-                'convert_webp': convert_webp,
-                'convert_avif': convert_avif,
-                'webp_quality': self.webp_quality.get(),
-                'avif_quality': self.avif_quality.get(),
-                'max_width': self.max_width.get(),
-                'max_height': self.max_height.get(),
-            }
-            
-            # Prepare arguments for multiprocessing
-            process_args = [(file_path, source_path, settings) for file_path in image_files]
-            
             # Use multiprocessing
-            max_workers = min(self.max_workers.get(), len(image_files))
+            max_workers = min(settings['max_workers'], len(image_files))
             self.progress_queue.put(("log", f"Using {max_workers} worker processes"))
             
+            # Split the CPUs between workers so encoder threads don't oversubscribe them
+            avif_threads = max(1, available_cpu_count() // max_workers)
+            
+            # Resolve output locations and what needs rebuilding once per batch
+            settings['outputs'] = build_output_plan(settings, webp_folder, avif_folder, avif_threads)
+            settings['stale_formats'] = self.check_settings_stamps(settings)
+            if settings['convert_avif']:
+                self.progress_queue.put(("log", f"AVIF encoder: {settings['avif_codec']}"))
+            
+            # Worker processes already keep every core busy
+            job = build_image_job(settings, parallel_encode=False)
+            
             processed_count = 0
             start_time = time.time()
             
-            self.executor = ProcessPoolExecutor(max_workers=max_workers)
+            # Pool size follows the setting so small batches don't force a new pool
+            executor = self.get_executor(settings['max_workers'])
+            in_flight = set()
             try:
-                # Submit all tasks
-                future_to_file = {self.executor.submit(process_single_image, args): args[0] 
-                                 for args in process_args}
+                # Keep only a few tasks queued per worker instead of submitting every file up front
+                source_dir = str(source_path)
+                pending_args = ((file_path, source_dir, job) for file_path in image_files)
+                max_in_flight = max_workers * 4
                 
-                # Process completed tasks
-                for future in as_completed(future_to_file):
+                while True:
                     # Check if stop was requested
                     if self.stop_processing:
                         self.progress_queue.put(("log", "Processing stopped by user"))
                         break
+                    
+                    for args in itertools.islice(pending_args, max_in_flight - len(in_flight)):
+                        in_flight.add(executor.submit(process_single_image, args))
+                    if not in_flight:
+                        break
+                    
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        try:
+                            result = future.result()
+                            processed_count += 1
                         
-                    try:
-                        result = future.result()
-                        processed_count += 1
-                        
-                        # Update progress
-                        progress_percent = (processed_count / total_files) * 100
-                        self.progress_queue.put(("progress", progress_percent))
+                            # Update progress
+                            progress_percent = (processed_count / total_files) * 100
+                            self.progress_queue.put(("progress", processed_count))
                         
-                        # Log messages (less frequently to avoid UI lag)
-                        if processed_count % 5 == 0 or processed_count <= 10:
-                            elapsed = time.time() - start_time
-                            rate = processed_count / elapsed if elapsed > 0 else 0
-                            eta = (total_files - processed_count) / rate if rate > 0 else 0
-                            self.progress_queue.put(("log", f"Progress: {processed_count}/{total_files} ({progress_percent:.1f}%) - {rate:.1f} img/sec - ETA: {eta:.0f}s"))
+                            # Log messages (less frequently to avoid UI lag)
+                            if processed_count % 5 == 0 or processed_count <= 10:
+                                elapsed = time.time() - start_time
+                                rate = processed_count / elapsed if elapsed > 0 else 0
+                                eta = (total_files - processed_count) / rate if rate > 0 else 0
+                                self.progress_queue.put(("status", f"Progress: {processed_count}/{total_files} ({progress_percent:.1f}%) - {rate:.1f} img/sec - ETA: {eta:.0f}s"))
                         
-                        # Log individual file messages for errors or first few files
-                        if not result['success'] or processed_count <= 5:
-                            for message in result['messages']:
-                                self.progress_queue.put(("log", message))
+                            # Log individual file messages for errors or first few files
+                            if not result['success'] or processed_count <= 5:
+                                for message in result['messages']:
+                                    self.progress_queue.put(("log", message))
                                 
-                    except Exception as e:
-                        self.progress_queue.put(("log", f"Error processing file: {str(e)}"))
+                        except BrokenProcessPool:
+                            raise
+                        except Exception as e:
+                            self.progress_queue.put(("log", f"Error processing file: {str(e)}"))
                         
+            except BrokenProcessPool:
+                # A worker died (e.g. out of memory), so start a fresh pool next run
+                self.shutdown_executor()
+                raise
             finally:
-                self.executor.shutdown(wait=True)
-                self.executor = None
+                # Drop queued work on stop; the pool itself stays up for the next run.
+                # cancel() can't stop images a worker has already picked up, so wait
+                # for those before reporting, or they would race the next run
+                running = [future for future in in_flight if not future.cancel()]
+                if running:
+                    wait(running)
+                    processed_count += sum(1 for future in running if future.exception() is None)
+                    self.progress_queue.put(("progress", processed_count))
             
             elapsed_time = time.time() - start_time
             avg_rate = processed_count / elapsed_time if elapsed_time > 0 else 0
             
             if self.stop_processing:
-                self.progress_queue.put(("log", f"Processing stopped! {processed_count} images processed in {elapsed_time:.1f}s (avg: {avg_rate:.1f} img/sec)"))
+                summary = f"Processing stopped! {processed_count} images processed in {elapsed_time:.1f}s (avg: {avg_rate:.1f} img/sec)"
+                self.progress_queue.put(("log", summary))
+                self.progress_queue.put(("status", summary))
                 self.progress_queue.put(("stopped", ""))
             else:
-                self.progress_queue.put(("log", f"Processing complete! {processed_count} images processed in {elapsed_time:.1f}s (avg: {avg_rate:.1f} img/sec)"))
+                # Only a finished run leaves every output matching the settings
+                write_settings_stamps(settings['outputs'], settings)
+                summary = f"Processing complete! {processed_count} images processed in {elapsed_time:.1f}s (avg: {avg_rate:.1f} img/sec)"
+                self.progress_queue.put(("log", summary))
+                self.progress_queue.put(("status", summary))
                 self.progress_queue.put(("complete", ""))
             
         except Exception as e:
             self.progress_queue.put(("error", f"Unexpected error: {str(e)}"))
     
-    def process_images_single(self):
+    def process_images_single(self, settings):
         """Original single-threaded processing (fallback)"""
         try:
-            source_path = Path(self.source_folder.get())
+            source_path = Path(settings['source_folder'])
             
             if not source_path.exists():
                 self.progress_queue.put(("error", "Source folder does not exist"))
                 return
                 
-            # Supported image formats
-            supported_formats = {'.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif', '.gif', '.webp'}
-            
             # Create output folders
             webp_folder = source_path / "webp"
             avif_folder = source_path / "avif"
             
-            if self.convert_webp.get():
+            if settings['convert_webp']:
                 webp_folder.mkdir(exist_ok=True)
                 self.progress_queue.put(("log", f"Created WEBP output folder"))
                 
-            if self.convert_avif.get():
+            if settings['convert_avif']:
                 avif_folder.mkdir(exist_ok=True)
                 self.progress_queue.put(("log", f"Created AVIF output folder"))
             
             # Find all image files
-            image_files = []
-            for file_path in source_path.rglob("*"):
-                if (file_path.is_file() and 
-                    file_path.suffix.lower() in supported_formats and
-                    "webp" not in file_path.parts and 
-                    "avif" not in file_path.parts):
-                    image_files.append(file_path)
+            image_files = list(iter_image_files(source_path))
             
             total_files = len(image_files)
             self.progress_queue.put(("log", f"Found {total_files} image files to process"))
@@ -474,12 +929,16 @@ class ImageOptimizer:
                 self.progress_queue.put(("error", "No supported image files found"))
                 return
             
-            # Process each image with optimizations (single-threaded)
+            # Resolve output locations and what needs rebuilding once per batch
+            settings['outputs'] = build_output_plan(settings, webp_folder, avif_folder)
+            settings['stale_formats'] = self.check_settings_stamps(settings)
+            if settings['convert_avif']:
+                self.progress_queue.put(("log", f"AVIF encoder: {settings['avif_codec']}"))
+            
+            job = build_image_job(settings, parallel_encode=True)
+            
+            # Process each image (single-threaded)
             processed_count = 0
-            webp_quality = self.webp_quality.get()
-            avif_quality = self.avif_quality.get()
-            convert_webp = self.convert_webp.get()
-            convert_avif = self.convert_avif.get()
             start_time = time.time()
             
             for file_path in image_files:
@@ -488,124 +947,74 @@ class ImageOptimizer:
                     self.progress_queue.put(("log", "Processing stopped by user"))
                     break
                     
-                try:
-                    relative_path = file_path.relative_to(source_path)
-                    
-                    # Open and process image with optimization
-                    with Image.open(file_path) as img:
-                        # Optimize loading for large images
-                        img.load()
-                        
-                        # Convert to RGB if necessary (optimized)
-                        if img.mode in ('RGBA', 'LA'):
-                            # Create white background only once
-                            background = Image.new('RGB', img.size, (255, 255, 255))
-                            background.paste(img, mask=img.split()[-1])
-                            img = background
-                        elif img.mode == 'P':
-                            # Handle palette mode
-                            img = img.convert('RGB')
-                        elif img.mode != 'RGB':
-                            img = img.convert('RGB')
-                        
-                        # Resize if needed (once for both formats)
-                        img = self.resize_image(img)
-                        
-                        # Save formats
-                        if convert_webp:
-                            webp_path = webp_folder / relative_path.with_suffix('.webp')
-                            webp_path.parent.mkdir(parents=True, exist_ok=True)
-                            # Use optimized save parameters
-                            img.save(webp_path, 'WEBP', quality=webp_quality, optimize=True, method=6)
-                        
-                        if convert_avif:
-                            avif_path = avif_folder / relative_path.with_suffix('.avif')
-                            avif_path.parent.mkdir(parents=True, exist_ok=True)
-                            try:
-                                # Use optimized AVIF parameters
-                                img.save(avif_path, 'AVIF', quality=avif_quality, optimize=True, speed=6)
-                            except Exception as e:
-                                self.progress_queue.put(("log", f"Failed to save AVIF for {relative_path}: {str(e)}"))
-                    
-                    processed_count += 1
-                    
-                    # Update progress
-                    progress_percent = (processed_count / total_files) * 100
-                    self.progress_queue.put(("progress", progress_percent))
-                    
-                    # Update progress periodically to keep UI responsive
-                    if processed_count % 5 == 0:
-                        elapsed = time.time() - start_time
-                        rate = processed_count / elapsed if elapsed > 0 else 0
-                        eta = (total_files - processed_count) / rate if rate > 0 else 0
-                        self.progress_queue.put(("log", f"Progress: {processed_count}/{total_files} - {rate:.1f} img/sec - ETA: {eta:.0f}s"))
-                    
-                except Exception as e:
-                    self.progress_queue.put(("log", f"Error processing {relative_path}: {str(e)}"))
+                result = process_single_image((file_path, source_path, job))
+                processed_count += 1
+                
+                # Update progress
+                self.progress_queue.put(("progress", processed_count))
+                
+                # Update progress periodically to keep UI responsive
+                if processed_count % 5 == 0:
+                    elapsed = time.time() - start_time
+                    rate = processed_count / elapsed if elapsed > 0 else 0
+                    eta = (total_files - processed_count) / rate if rate > 0 else 0
+                    self.progress_queue.put(("status", f"Progress: {processed_count}/{total_files} - {rate:.1f} img/sec - ETA: {eta:.0f}s"))
+                
+                # Log errors for individual files
+                if not result['success']:
+                    for message in result['messages']:
+                        self.progress_queue.put(("log", message))
             
             elapsed_time = time.time() - start_time
             avg_rate = processed_count / elapsed_time if elapsed_time > 0 else 0
             
             if self.stop_processing:
-                self.progress_queue.put(("log", f"Processing stopped! {processed_count} images processed in {elapsed_time:.1f}s (avg: {avg_rate:.1f} img/sec)"))
+                summary = f"Processing stopped! {processed_count} images processed in {elapsed_time:.1f}s (avg: {avg_rate:.1f} img/sec)"
+                self.progress_queue.put(("log", summary))
+                self.progress_queue.put(("status", summary))
                 self.progress_queue.put(("stopped", ""))
             else:
-                self.progress_queue.put(("log", f"Processing complete! {processed_count} images processed in {elapsed_time:.1f}s (avg: {avg_rate:.1f} img/sec)"))
+                # Only a finished run leaves every output matching the settings
+                write_settings_stamps(settings['outputs'], settings)
+                summary = f"Processing complete! {processed_count} images processed in {elapsed_time:.1f}s (avg: {avg_rate:.1f} img/sec)"
+                self.progress_queue.put(("log", summary))
+                self.progress_queue.put(("status", summary))
                 self.progress_queue.put(("complete", ""))
             
         except Exception as e:
             self.progress_queue.put(("error", f"Unexpected error: {str(e)}"))
     
-    def resize_image(self, img):
-        """Resize image based on max width and height settings"""
-        original_width, original_height = img.size
-        max_w = self.max_width.get() if self.max_width.get() > 0 else None
-        max_h = self.max_height.get() if self.max_height.get() > 0 else None
-        
-        # If no limits set, return original
-        if not max_w and not max_h:
-            return img
-        
-        # Don't enlarge images
-        if max_w and original_width <= max_w and max_h and original_height <= max_h:
-            return img
-        if max_w and not max_h and original_width <= max_w:
-            return img
-        if max_h and not max_w and original_height <= max_h:
-            return img
-        
-        # Calculate new dimensions
-        if max_w and max_h:
-            # Both dimensions specified - maintain aspect ratio
-            ratio = min(max_w / original_width, max_h / original_height)
-        elif max_w:
-            # Only width specified
-            ratio = max_w / original_width
-        else:
-            # Only height specified
-            ratio = max_h / original_height
-        
-        # Don't enlarge
-        if ratio >= 1:
-            return img
-            
-        new_width = int(original_width * ratio)
-        new_height = int(original_height * ratio)
-        
-        return img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-    
     def check_progress(self):
         """Check for messages from processing thread"""
+        pending_logs = []
+        latest_progress = None
+        latest_status = None
         try:
             while True:
                 msg_type, message = self.progress_queue.get_nowait()
                 
                 if msg_type == "log":
-                    self.log_message(message)
-                elif msg_type == "progress_total":
+                    # Collect log lines and write them in one go
+                    pending_logs.append(message)
+                    continue
+                if msg_type == "progress":
+                    # Only the newest count matters for the bar
+                    latest_progress = message
+                    continue
+                if msg_type == "status":
+                    latest_status = message
+                    continue
+                    
+                # Flush queued lines and status first so they show before any dialog
+                if pending_logs:
+                    self.log_messages(pending_logs)
+                    pending_logs = []
+                if latest_status is not None:
+                    self.status_text.set(latest_status)
+                    latest_status = None
+                    
+                if msg_type == "progress_total":
                     self.progress.config(maximum=message)
-                elif msg_type == "progress":
-                    self.progress.config(value=message)
                 elif msg_type == "error":
                     self.log_message(f"ERROR: {message}")
                     messagebox.showerror("Error", message)
@@ -623,8 +1032,16 @@ class ImageOptimizer:
         except queue.Empty:
             pass
         
-        # Schedule next check
-        self.root.after(50, self.check_progress)  # More frequent updates for better progress display
+        if pending_logs:
+            self.log_messages(pending_logs)
+        if latest_progress is not None and self.is_processing:
+            self.progress.config(value=latest_progress)
+        if latest_status is not None:
+            self.status_text.set(latest_status)
+        
+        # Schedule next check until the batch has finished
+        if self.is_processing:
+            self.root.after(100, self.check_progress)
     
     def finish_processing(self):
         """Reset UI after processing is complete"""
@@ -644,11 +1061,19 @@ def main():
     try:
         # Check if PIL supports AVIF
         from PIL import Image
+        init_worker()
         supported_formats = Image.registered_extensions()
         if '.avif' not in supported_formats:
             print("Warning: AVIF format not supported. Please install pillow-avif-plugin")
         else:
             print("AVIF and WEBP formats are supported!")
+        
+        # JPEG decode is noticeably slower without libjpeg-turbo
+        from PIL import features
+        if features.check_feature('libjpeg_turbo'):
+            print("JPEG decoding uses libjpeg-turbo")
+        else:
+            print("Note: Pillow was built without libjpeg-turbo; JPEG decoding will be slower")
     except ImportError:
         pass
     
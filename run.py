@@ -3,33 +3,56 @@
 Simple launcher for the Image Optimizer application
 """
 
+import os
 import sys
-import subprocess
-from pathlib import Path
+
+# Directory where this script is located
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Path to the main application
+APP_PATH = os.path.join(SCRIPT_DIR, "image_optimizer.py")
+
+# Path to the virtual environment and its Python
+VENV_DIR = os.path.join(SCRIPT_DIR, ".venv")
+if os.name == 'nt':
+    VENV_PYTHON = os.path.join(VENV_DIR, "Scripts", "python.exe")
+else:
+    VENV_PYTHON = os.path.join(VENV_DIR, "bin", "python")
 
 def main():
     """Launch the image optimizer application"""
-    # Get the directory where this script is located
-    script_dir = Path(__file__).parent
+    # Compare prefixes rather than executables: the venv python is usually a
+    # symlink to the same binary as the system python
+    in_venv = os.path.realpath(sys.prefix) == os.path.realpath(VENV_DIR)
     
-    # Path to the main application
-    app_path = script_dir / "image_optimizer.py"
-    
-    # Path to the virtual environment Python
-    venv_python = script_dir / ".venv" / "bin" / "python"
+    if os.path.isfile(VENV_PYTHON) and not in_venv:
+        if os.name != 'nt':
+            # Replace this process instead of keeping a second interpreter waiting;
+            # execv only returns if the venv python can't be started
+            try:
+                os.execv(VENV_PYTHON, [VENV_PYTHON, APP_PATH])
+            except OSError as e:
+                print(f"Could not start the virtual environment Python ({e}), using {sys.executable}")
+        else:
+            # Only Windows needs subprocess, so other platforms skip the import
+            import subprocess
+            try:
+                # The GUI never reads stdin
+                subprocess.run([VENV_PYTHON, APP_PATH], stdin=subprocess.DEVNULL)
+            except KeyboardInterrupt:
+                print("\nApplication closed by user")
+            except Exception as e:
+                print(f"Error launching application: {e}")
+                sys.exit(1)
+            return
     
+    # Already on the right interpreter, so run the app in this process
+    sys.path.insert(0, SCRIPT_DIR)
     try:
-        if venv_python.exists():
-            # Use virtual environment Python
-            subprocess.run([str(venv_python), str(app_path)])
-        else:
-            # Fall back to system Python
-            subprocess.run([sys.executable, str(app_path)])
+        import image_optimizer
+        image_optimizer.main()
     except KeyboardInterrupt:
         print("\nApplication closed by user")
-    except Exception as e:
-        print(f"Error launching application: {e}")
-        sys.exit(1)
 
 if __name__ == "__main__":
     main()
@@ -13,6 +13,6 @@ else
     PYTHON_CMD="python3"
 fi
 
-# Run the image optimizer
+# Run the image optimizer, replacing this shell rather than waiting on it
 echo "Starting Image Optimizer..."
-$PYTHON_CMD "$SCRIPT_DIR/image_optimizer.py"
+exec "$PYTHON_CMD" "$SCRIPT_DIR/image_optimizer.py"